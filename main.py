@@ -2,6 +2,7 @@ import os
 import sys
 from langchain_core.messages import HumanMessage
 from graph import app
+from speculation import Speculator
 import json
 
 def main():
@@ -35,6 +36,9 @@ def main():
     
     current_state = initial_state
     
+    # Optional speculative mode: precompute likely next turns while the player types
+    speculator = Speculator() if os.environ.get("RPG_SPECULATIVE") == "1" else None
+    
     def parse_and_display(message_content):
         try:
             if message_content.startswith("```json"):
@@ -82,6 +86,9 @@ def main():
     result = app.invoke(current_state)
     last_ai_msg = result['history'][-1]
     parse_and_display(last_ai_msg.content)
+    current_state = result
+    if speculator:
+        speculator.speculate(current_state)
 
     while True:
         try:
@@ -89,14 +96,20 @@ def main():
             if user_input.lower() in ["exit", "quit"]:
                 break
             
-            graph_input = {"history": [HumanMessage(content=user_input)]}
-            
-            result = app.invoke(graph_input)
+            result = speculator.take(user_input) if speculator else None
+            if result is None:
+                # There is no checkpointer, so the full state (with the new message) must be passed every turn
+                graph_input = {**current_state, "history": current_state["history"] + [HumanMessage(content=user_input)]}
+                result = app.invoke(graph_input)
+            current_state = result
             
             # Get latest response
             last_ai_msg = result['history'][-1]
             data = parse_and_display(last_ai_msg.content)
             
+            if speculator:
+                speculator.speculate(current_state)
+            
             # Check game over conditions
             if "health" in result and result["health"] <= 0:
                 print("\n[GAME OVER] You collapsed.")
@@ -108,5 +121,14 @@ def main():
             print(f"Error: {e}")
             break
 
+    if speculator:
+        stats = speculator.stats()
+        print(f"\n[SPECULATION] Hit rate: {stats['hit_rate']:.0%} ({stats['hits']}/{stats['hits'] + stats['misses']}), "
+              f"skipped turns: {stats['skipped']}, wasted tokens: {stats['wasted_tokens']}, "
+              f"intent tokens: {stats['intent_tokens']}")
+        if stats["budget_exhausted"]:
+            print("[SPECULATION] Token budget exhausted, speculation stopped.")
+        speculator.shutdown()
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,286 @@
+import copy
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.messages import SystemMessage, HumanMessage
+from game_state import GameState
+
+logger = logging.getLogger(__name__)
+
+# Prompt used to guess what the player is most likely to type next
+INTENT_PROMPT = """Eres un asistente que predice la siguiente acción del jugador en un RPG de texto para aprender inglés.
+A partir del contexto y de la última respuesta del PNJ, genera las {n} frases más probables que el jugador escribirá a continuación
+(por ejemplo: aceptar la oferta del PNJ, pedir direcciones, avanzar en la misión activa).
+Escribe las frases en el idioma objetivo y con el nivel del jugador, cortas y naturales.
+Devuelve SOLO una lista JSON de strings, sin bloques de código markdown alrededor.
+"""
+
+
+def normalize_input(text: str) -> str:
+    """
+    Lowercases the text and strips punctuation and extra whitespace so that
+    "Yes, please!" and "yes please" compare as equal.
+    """
+    text = re.sub(r"[^\w\s']", " ", text.lower())
+    return " ".join(text.split())
+
+
+def count_tokens(result: Dict[str, Any]) -> int:
+    """
+    Returns the tokens spent on the last AI message of a graph result.
+    Falls back to a rough characters/4 estimate when the provider does not report usage.
+    """
+    history = result.get("history") or []
+    if not history:
+        return 0
+    message = history[-1]
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage.get("total_tokens"):
+        return usage["total_tokens"]
+    return len(str(message.content)) // 4
+
+
+class Speculation:
+    """
+    A single precomputed turn for a predicted player intent.
+    """
+    def __init__(self, intent: str):
+        self.intent = intent
+        self.key = normalize_input(intent)
+        self.future = None
+        self.finished = False
+        self.discarded = False
+        self.tokens = 0
+        self.reserved = 0
+
+
+class Speculator:
+    """
+    Optional speculative mode: after each reply it predicts a few likely player
+    intents and precomputes the graph result for each one in the background,
+    so a matching real input can be answered without waiting for the LLM.
+    """
+    def __init__(
+        self,
+        runner: Optional[Callable[[GameState], Dict[str, Any]]] = None,
+        max_intents: int = 3,
+        max_concurrency: int = 2,
+        token_budget: int = 50000,
+        turn_token_estimate: int = 2000,
+    ):
+        if runner is None:
+            from graph import app
+            runner = app.invoke
+        self.runner = runner
+        self.max_intents = max_intents
+        self.token_budget = token_budget
+        # Cost reserved for each LLM call before it starts, so calls in flight
+        # can never push the total past the budget
+        self.turn_token_estimate = turn_token_estimate
+        self.reserved_tokens = 0
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="speculation")
+        # Intent prediction gets its own thread so it never holds a worker meant for turns
+        self.launcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="speculation-launcher")
+        self.pending: List[Speculation] = []
+        self.generation = 0
+        self.lock = threading.Lock()
+        self.metrics = {
+            "turns": 0,
+            "hits": 0,
+            "misses": 0,
+            # Turns with nothing speculated (budget spent, launch skipped or failed)
+            "skipped": 0,
+            "speculations": 0,
+            "spent_tokens": 0,
+            "intent_tokens": 0,
+            "wasted_tokens": 0,
+        }
+
+    def budget_left(self, cost: int = 0) -> bool:
+        spent = self.metrics["spent_tokens"] + self.metrics["intent_tokens"] + self.reserved_tokens
+        return spent + cost <= self.token_budget
+
+    def predict_intents(self, state: GameState) -> List[str]:
+        """
+        Asks the LLM for the most likely next player inputs given the current state.
+        """
+        if "GOOGLE_API_KEY" not in os.environ:
+            raise ValueError("GOOGLE_API_KEY not found in environment.")
+
+        llm = ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.3)
+
+        history = state.get("history", [])
+        last_reply = history[-1].content if history else ""
+        context_str = f"""
+    Contexto Actual:
+    - Idioma Objetivo: {state.get("target_language", "English")}
+    - Ubicación: {state.get("location", "King's Cross Station")}
+    - Inventario: {state.get("inventory", [])}
+    - Nivel: {state.get("language_level", "Beginner")}
+    - Misión: {state.get("mission", "Exit the station")}
+    - Última respuesta: {last_reply}
+    """
+        response = llm.invoke([
+            SystemMessage(content=INTENT_PROMPT.format(n=self.max_intents)),
+            HumanMessage(content=context_str),
+        ])
+
+        with self.lock:
+            self.metrics["intent_tokens"] += count_tokens({"history": [response]})
+
+        try:
+            content = response.content.strip()
+            if content.startswith("```json"):
+                content = content[7:-3].strip()
+            elif content.startswith("```"):
+                content = content[3:-3].strip()
+            intents = json.loads(content)
+        except json.JSONDecodeError:
+            return []
+
+        if not isinstance(intents, list):
+            return []
+        return [i for i in intents if isinstance(i, str) and i.strip()][: self.max_intents]
+
+    def speculate(self, state: GameState) -> Optional[Future]:
+        """
+        Discards any previous speculations and starts precomputing the next turn
+        for the predicted intents. Returns immediately with the future of the launch;
+        the work runs in the background.
+        """
+        self.discard()
+        with self.lock:
+            if not self.budget_left(self.turn_token_estimate):
+                return None
+            generation = self.generation
+
+        snapshot = copy.deepcopy(state)
+        return self.launcher.submit(self._launch, snapshot, generation)
+
+    def _launch(self, state: GameState, generation: int) -> None:
+        with self.lock:
+            # The player already answered: don't spend tokens on a stale prediction
+            if generation != self.generation:
+                return
+            reserved = self.turn_token_estimate
+            if not self.budget_left(reserved):
+                return
+            self.reserved_tokens += reserved
+        try:
+            intents = self.predict_intents(state)
+        except Exception:
+            logger.exception("Intent prediction failed, skipping speculation for this turn.")
+            return
+        finally:
+            with self.lock:
+                self.reserved_tokens -= reserved
+
+        for intent in intents:
+            with self.lock:
+                if generation != self.generation or not self.budget_left(self.turn_token_estimate):
+                    return
+                speculation = Speculation(intent)
+                speculation.reserved = self.turn_token_estimate
+                self.reserved_tokens += speculation.reserved
+                speculation.future = self.executor.submit(self._run, state, speculation)
+                self.pending.append(speculation)
+                self.metrics["speculations"] += 1
+
+    def _run(self, state: GameState, speculation: Speculation) -> Dict[str, Any]:
+        # game_node mutates the state it receives, so every speculation works on its own copy
+        state_to_pass = copy.deepcopy(state)
+        state_to_pass["history"] = state_to_pass.get("history", []) + [HumanMessage(content=speculation.intent)]
+        try:
+            result = self.runner(state_to_pass)
+        finally:
+            with self.lock:
+                self.reserved_tokens -= speculation.reserved
+
+        tokens = count_tokens(result)
+        with self.lock:
+            # Turns costlier than the estimate raise the reservation for the next ones
+            self.turn_token_estimate = max(self.turn_token_estimate, tokens)
+            speculation.tokens = tokens
+            speculation.finished = True
+            self.metrics["spent_tokens"] += tokens
+            # Finished after its turn was already discarded: nobody will use it
+            if speculation.discarded:
+                self.metrics["wasted_tokens"] += tokens
+        return result
+
+    def match(self, user_input: str) -> Optional[Speculation]:
+        # Only case and punctuation may differ: the precomputed turn graded the
+        # predicted sentence, so any other difference would skip the evaluation
+        key = normalize_input(user_input)
+        for speculation in self.pending:
+            if speculation.key == key and not speculation.future.cancelled():
+                return speculation
+        return None
+
+    def take(self, user_input: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the precomputed graph result if the real input matches a speculation
+        up to case and punctuation, otherwise None. All other speculations are discarded either way.
+        """
+        with self.lock:
+            self.metrics["turns"] += 1
+            speculated = bool(self.pending)
+            speculation = self.match(user_input)
+            if speculation is not None:
+                self.pending.remove(speculation)
+        # Cancel the rest before waiting, so queued speculations never start
+        self.discard()
+
+        result = None
+        if speculation is not None:
+            try:
+                # If it is still running, waiting is still faster than starting over
+                result = speculation.future.result()
+            except Exception:
+                logger.exception("Speculative turn failed, falling back to a normal turn.")
+                result = None
+
+        with self.lock:
+            if result is not None:
+                self.metrics["hits"] += 1
+            elif speculated:
+                self.metrics["misses"] += 1
+            else:
+                self.metrics["skipped"] += 1
+
+        return result
+
+    def discard(self) -> None:
+        """
+        Drops all pending speculations. Finished ones count as wasted tokens;
+        running ones are counted when they complete.
+        """
+        with self.lock:
+            self.generation += 1
+            for speculation in self.pending:
+                speculation.discarded = True
+                if speculation.future.cancel():
+                    self.reserved_tokens -= speculation.reserved
+                    continue
+                if speculation.finished:
+                    self.metrics["wasted_tokens"] += speculation.tokens
+            self.pending = []
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.metrics)
+            stats["budget_exhausted"] = not self.budget_left(self.turn_token_estimate)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def shutdown(self) -> None:
+        self.discard()
+        self.launcher.shutdown(wait=False, cancel_futures=True)
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -3,6 +3,7 @@ import os
 import json
 from langchain_core.messages import HumanMessage
 from graph import app
+from speculation import Speculator
 
 # Page config
 st.set_page_config(page_title="London RPG Adventure", page_icon="🇬🇧", layout="wide")
@@ -65,7 +66,27 @@ def main():
                 
             st.divider()
             
+            st.subheader("⚡ Speculative Mode")
+            if st.toggle("Prefetch likely next turns", key="speculative"):
+                if "speculator" not in st.session_state:
+                    st.session_state.speculator = Speculator()
+                    st.session_state.speculator.speculate(state)
+                stats = st.session_state.speculator.stats()
+                c1, c2, c3 = st.columns(3)
+                c1.metric("Hit Rate", f"{stats['hit_rate']:.0%}")
+                c2.metric("Skipped Turns", stats["skipped"])
+                c3.metric("Wasted Tokens", stats["wasted_tokens"])
+                if stats["budget_exhausted"]:
+                    st.warning("Token budget exhausted, speculation stopped.")
+            elif "speculator" in st.session_state:
+                st.session_state.speculator.shutdown()
+                del st.session_state.speculator
+            
+            st.divider()
+            
             if st.button("Restart Game"):
+                if "speculator" in st.session_state:
+                    st.session_state.speculator.shutdown()
                 for key in list(st.session_state.keys()):
                     del st.session_state[key]
                 st.rerun()
@@ -202,10 +223,15 @@ def main():
                 
                 state_to_pass["history"].append(HumanMessage(content=prompt))
                 
-                result = app.invoke(state_to_pass)
+                speculator = st.session_state.get("speculator")
+                result = speculator.take(prompt) if speculator else None
+                if result is None:
+                    result = app.invoke(state_to_pass)
                 
                 # Update Session State
                 st.session_state.game_state = result
+                if speculator:
+                    speculator.speculate(result)
                 
                 # Extract AI response
                 last_msg = result['history'][-1]
@@ -0,0 +1,221 @@
+import unittest
+from unittest.mock import MagicMock, patch
+from langchain_core.messages import AIMessage, HumanMessage
+from game_state import GameState
+from speculation import Speculator, count_tokens, normalize_input
+import json
+import os
+import threading
+import time
+
+class TestSpeculator(unittest.TestCase):
+    def setUp(self):
+        self.initial_state: GameState = {
+            "inventory": ["Oyster Card"],
+            "location": "King's Cross Station",
+            "health": 100,
+            "respect": 100,
+            "language_level": "Beginner",
+            "history": [AIMessage(content="Do you need a map, love?")],
+            "mission": "Exit the station",
+            "target_language": "English",
+            "linguistic_evaluation": None
+        }
+        # Mock env var for testing
+        os.environ["GOOGLE_API_KEY"] = "fake_key"
+
+        # Fake graph: answers with a reply that echoes the last player input
+        self.runner = MagicMock(side_effect=self.reply)
+
+    def reply(self, state):
+        reply = AIMessage(content=json.dumps({"dialogo_pnj": f"Re: {state['history'][-1].content}"}))
+        return {**state, "history": state["history"] + [reply]}
+
+    def tokens_for(self, intent):
+        return count_tokens(self.reply({"history": [HumanMessage(content=intent)]}))
+
+    def block_runner(self):
+        # Keeps every precomputed turn in flight until `release` is set
+        started, release = threading.Event(), threading.Event()
+
+        def runner(state):
+            started.set()
+            release.wait()
+            return self.reply(state)
+
+        self.runner.side_effect = runner
+        return started, release
+
+    def speculate(self, speculator, intents, wait=True):
+        # Run the background launch and, unless told otherwise, every precomputed turn
+        with patch("speculation.ChatGoogleGenerativeAI") as mock_chat:
+            mock_chat.return_value.invoke.return_value = AIMessage(content=json.dumps(intents))
+            launch = speculator.speculate(self.initial_state)
+            if launch is not None:
+                launch.result()
+        if wait:
+            for speculation in speculator.pending:
+                speculation.future.result()
+
+    def test_normalize_input(self):
+        self.assertEqual(normalize_input("  Yes, please!  "), "yes please")
+
+    def test_hit_serves_precomputed_turn(self):
+        speculator = Speculator(runner=self.runner)
+        self.speculate(speculator, ["Yes, please!", "Where is the exit?"])
+
+        result = speculator.take("yes please")
+
+        self.assertIsNotNone(result)
+        # The history keeps the sentence that was actually evaluated
+        self.assertEqual(result["history"][-2].content, "Yes, please!")
+        self.assertIn("Re: Yes, please!", result["history"][-1].content)
+        # The state passed in is never mutated by speculation
+        self.assertEqual(len(self.initial_state["history"]), 1)
+
+        stats = speculator.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["hit_rate"], 1.0)
+        self.assertEqual(stats["wasted_tokens"], self.tokens_for("Where is the exit?"))
+        self.assertEqual(speculator.pending, [])
+        speculator.shutdown()
+
+    def test_miss_discards_speculations(self):
+        speculator = Speculator(runner=self.runner)
+        self.speculate(speculator, ["Yes, please!", "Where is the exit?"])
+        spent = speculator.stats()["spent_tokens"]
+
+        result = speculator.take("I buy a sandwich")
+
+        self.assertIsNone(result)
+        stats = speculator.stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.0)
+        self.assertEqual(stats["wasted_tokens"], spent)
+        self.assertEqual(speculator.pending, [])
+        speculator.shutdown()
+
+    def test_hit_cancels_queued_speculations(self):
+        started, release = self.block_runner()
+        speculator = Speculator(runner=self.runner, max_concurrency=1)
+        self.speculate(speculator, ["Yes, please!", "Where is the exit?"], wait=False)
+        started.wait(timeout=5)
+
+        # The player types while "Yes, please!" is still running and the other one is queued
+        results = []
+        taking = threading.Thread(target=lambda: results.append(speculator.take("yes please")))
+        taking.start()
+        deadline = time.monotonic() + 5
+        while speculator.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        taking.join(timeout=5)
+        speculator.executor.shutdown(wait=True)
+
+        self.assertIsNotNone(results[0])
+        self.assertEqual([c.args[0]["history"][-1].content for c in self.runner.call_args_list], ["Yes, please!"])
+        self.assertEqual(speculator.stats()["wasted_tokens"], 0)
+        self.assertEqual(speculator.reserved_tokens, 0)
+        speculator.shutdown()
+
+    def test_ungrammatical_input_is_not_served(self):
+        speculator = Speculator(runner=self.runner)
+        self.speculate(speculator, ["I want to buy a ticket"])
+
+        result = speculator.take("I want buy a ticket")
+
+        self.assertIsNone(result)
+        self.assertEqual(speculator.stats()["misses"], 1)
+        speculator.shutdown()
+
+    def test_turn_without_speculations_is_skipped(self):
+        speculator = Speculator(runner=self.runner, token_budget=1)
+        self.assertIsNone(speculator.speculate(self.initial_state))
+
+        self.assertIsNone(speculator.take("Yes, please!"))
+
+        stats = speculator.stats()
+        self.assertEqual(stats["skipped"], 1)
+        self.assertEqual(stats["misses"], 0)
+        self.assertEqual(stats["hit_rate"], 0.0)
+        self.assertTrue(stats["budget_exhausted"])
+        speculator.shutdown()
+
+    def test_intent_cap(self):
+        speculator = Speculator(runner=self.runner, max_intents=2)
+        self.speculate(speculator, ["Yes", "No", "Where is the exit?", "Thanks"])
+
+        self.assertEqual(self.runner.call_count, 2)
+        self.assertEqual(speculator.stats()["speculations"], 2)
+        speculator.shutdown()
+
+    def test_token_budget(self):
+        speculator = Speculator(runner=self.runner, token_budget=1)
+        self.speculate(speculator, ["Yes", "No"])
+
+        # Not even the intent prediction fits in the budget
+        self.runner.assert_not_called()
+        self.assertEqual(speculator.stats()["intent_tokens"], 0)
+        speculator.shutdown()
+
+    def test_token_budget_reserves_turns_in_flight(self):
+        # Intent prediction reserves 10 and spends 5, leaving room for only two reserved turns
+        _, release = self.block_runner()
+        speculator = Speculator(runner=self.runner, token_budget=30, turn_token_estimate=10)
+        self.speculate(speculator, ["Yes", "No", "Thanks"], wait=False)
+        release.set()
+        for speculation in speculator.pending:
+            speculation.future.result()
+
+        self.assertEqual(self.runner.call_count, 2)
+        self.assertEqual(speculator.reserved_tokens, 0)
+        speculator.shutdown()
+
+    def test_discarded_in_flight_counts_as_wasted(self):
+        started, release = self.block_runner()
+        speculator = Speculator(runner=self.runner)
+        self.speculate(speculator, ["Where is the exit?"], wait=False)
+        started.wait(timeout=5)
+        speculation = speculator.pending[0]
+
+        self.assertIsNone(speculator.take("I buy a sandwich"))
+        self.assertEqual(speculator.stats()["wasted_tokens"], 0)
+
+        release.set()
+        speculation.future.result()
+        self.assertEqual(speculator.stats()["wasted_tokens"], self.tokens_for("Where is the exit?"))
+        speculator.shutdown()
+
+    def test_stale_launch_adds_nothing(self):
+        started, release = threading.Event(), threading.Event()
+
+        def predict(messages):
+            started.set()
+            release.wait()
+            return AIMessage(content=json.dumps(["Yes, please!"]))
+
+        speculator = Speculator(runner=self.runner)
+        with patch("speculation.ChatGoogleGenerativeAI") as mock_chat:
+            mock_chat.return_value.invoke.side_effect = predict
+            launch = speculator.speculate(self.initial_state)
+            started.wait(timeout=5)
+            # The player answers while the intents are still being predicted
+            speculator.discard()
+            release.set()
+            launch.result()
+
+        self.assertEqual(speculator.pending, [])
+        self.runner.assert_not_called()
+        speculator.shutdown()
+
+    def test_failed_intent_prediction_is_logged(self):
+        speculator = Speculator(runner=self.runner)
+        with patch.dict(os.environ, clear=True), self.assertLogs("speculation", level="ERROR"):
+            speculator.speculate(self.initial_state).result()
+
+        self.assertEqual(speculator.pending, [])
+        self.assertEqual(speculator.reserved_tokens, 0)
+        speculator.shutdown()
+
+if __name__ == "__main__":
+    unittest.main()